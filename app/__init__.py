@@ -1,14 +1,34 @@
 """
 Aplicación principal Roda Auth Service
+
+Los atributos se resuelven de forma perezosa: importar un submódulo
+(por ejemplo app.config desde Alembic) no carga FastAPI, los routers
+ni el cliente de almacenamiento.
 """
-from .main import app
-from .database import engine, SessionLocal, Base
-from .config.settings import settings
+from importlib import import_module
+
+_LAZY_ATTRIBUTES = {
+    "app": "app.main",
+    "engine": "app.database",
+    "SessionLocal": "app.database",
+    "Base": "app.database",
+    "settings": "app.config.settings"
+}
 
 __all__ = [
     "app",
-    "engine", 
+    "engine",
     "SessionLocal",
     "Base",
     "settings"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
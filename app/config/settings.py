@@ -1,9 +1,14 @@
 import os
+from functools import lru_cache
 from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: int = 30
     GOOGLE_APPLICATION_CREDENTIALS: str
     #GOOGLE_APPLICATION_CREDENTIALS: str = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
     
@@ -11,10 +16,16 @@ class Settings(BaseSettings):
     ALGORITHM: str 
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    TOKEN_CACHE_TTL: int = 15
+    TOKEN_CACHE_MAXSIZE: int = 10000
+    USERS_LIST_CACHE_TTL: int = 10
+    USERS_LIST_CACHE_MAXSIZE: int = 256
     
       
     GCP_PROJECT_ID: str
     GCP_BUCKET_NAME: str
+    MAX_UPLOAD_BYTES: int = 5 * 1024 * 1024
+    MAX_CONCURRENT_UPLOADS: int = 32
     
     CLOUD_PROVIDER: str
     
@@ -22,6 +33,14 @@ class Settings(BaseSettings):
     APP_VERSION: str
     DEBUG: bool 
     
+    HEALTH_CHECK_INTERVAL_SECONDS: int = 5
+    
+    AUDIT_ENABLED: bool = True
+    AUDIT_ACTIONS: list = []
+    AUDIT_QUEUE_MAXSIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 0.1
+    
     ALLOWED_ORIGINS: list = [
         "http://localhost:3000",
         "http://localhost:5001",
@@ -36,4 +55,10 @@ class Settings(BaseSettings):
         extra="ignore"
 
 
-settings = Settings()
\ No newline at end of file
+@lru_cache
+def get_settings() -> Settings:
+    """Instancia única de Settings; usable como dependencia y sobreescribible en tests"""
+    return Settings()
+
+
+settings = get_settings()
\ No newline at end of file
@@ -5,13 +5,22 @@ from app.config.settings import settings
 
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True)
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    echo_pool=False)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
 def get_db():
+    """
+    Sesión por request. No se usa scoped_session: el request salta entre hilos
+    del threadpool (run_in_threadpool) y una sesión por hilo se partiría en varias
+    """
     db = SessionLocal()
     try:
         yield db
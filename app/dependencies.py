@@ -0,0 +1,29 @@
+"""
+Dependencias compartidas por los routers
+"""
+from typing import Optional
+
+from fastapi import Depends, Request
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.auth_service import AuthService
+from app.services.user_service import UserService
+
+
+async def get_client_ip(request: Request) -> Optional[str]:
+    """IP del cliente para auditoría; único punto a ajustar si se confía en un proxy"""
+    return request.client.host if request.client else None
+
+
+async def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
+    """
+    AuthService del request. FastAPI cachea las dependencias por request, así que
+    la autenticación y el endpoint comparten la misma instancia y sesión
+    """
+    return AuthService(db)
+
+
+async def get_user_service(db: Session = Depends(get_db)) -> UserService:
+    """UserService del request, construido sobre la sesión de get_db"""
+    return UserService(db)
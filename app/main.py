@@ -1,35 +1,87 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from contextlib import asynccontextmanager, suppress
+from sqlalchemy import text
 
 from app.config.settings import settings
-from app.utils.audit import setup_app_logging
+from app.utils.audit import setup_app_logging, shutdown_app_logging, start_audit_worker, stop_audit_worker
+from app.utils.middleware import AllowedHostsMiddleware
 from app.database import engine, Base
 from app.routers import auth_router, users_router
 
 
+logger = logging.getLogger("roda_auth")
+
+
+_health_state = {
+    "status": "unhealthy",
+    "database": "disconnected",
+    "error": None,
+    "checked_at": None
+}
+
+
+def _check_database():
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def _update_health_state():
+    """Ejecutar SELECT 1 fuera del event loop y guardar el resultado"""
+    try:
+        await asyncio.to_thread(_check_database)
+        _health_state.update(status="healthy", database="connected", error=None)
+    except Exception as e:
+        _health_state.update(status="unhealthy", database="disconnected", error=str(e))
+    
+    _health_state["checked_at"] = datetime.now(timezone.utc).isoformat()
+
+
+async def _health_monitor():
+    while True:
+        await asyncio.sleep(settings.HEALTH_CHECK_INTERVAL_SECONDS)
+        await _update_health_state()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manejar ciclo de vida de la aplicación"""
     setup_app_logging()
     
-    try:
-        Base.metadata.create_all(bind=engine)
-        print("Base de datos inicializada correctamente")
-    except Exception as e:
-        print(f"Error inicializando base de datos: {e}")
+    if settings.DEBUG:
+        try:
+            Base.metadata.create_all(bind=engine)
+            logger.info("Base de datos inicializada correctamente")
+        except Exception as e:
+            logger.exception("Error inicializando base de datos: %s", e)
+    
+    await _update_health_state()
+    health_task = asyncio.create_task(_health_monitor())
+    start_audit_worker()
     
     yield
     
-    print("Aplicación cerrada")
+    health_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await health_task
+    
+    await stop_audit_worker()
+    
+    logger.info("Aplicación cerrada")
+    shutdown_app_logging()
 
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Microservicio de autenticación para Roda",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -41,8 +93,9 @@ app.add_middleware(
     allow_headers=["*"],
 )   
 app.add_middleware(
-    TrustedHostMiddleware,
-    allowed_hosts=["localhost", "127.0.0.1", "*.roda.com"]
+    AllowedHostsMiddleware,
+    allowed_hosts=("localhost", "127.0.0.1"),
+    allowed_suffixes=(".roda.com",)
 )
 
 
@@ -50,44 +103,49 @@ app.include_router(auth_router, prefix="/api/v1")
 app.include_router(users_router, prefix="/api/v1")
 
 
+_ROOT_CONTENT = json.dumps({
+    "message": f"Bienvenido a {settings.APP_NAME}",
+    "version": settings.APP_VERSION,
+    "docs": "/docs"
+}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
 @app.get("/")
 async def root():
     """Endpoint raíz"""
-    return {
-        "message": f"Bienvenido a {settings.APP_NAME}",
-        "version": settings.APP_VERSION,
-        "docs": "/docs"
-    }
+    return Response(content=_ROOT_CONTENT, media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    try:
-        from sqlalchemy import text
-        with engine.connect() as connection:
-            connection.execute(text("SELECT 1"))
-        
+    """
+    Health check endpoint
+    Retorna el último estado calculado por la tarea de monitoreo,
+    sin abrir una conexión a la base de datos en cada request
+    """
+    if _health_state["status"] == "healthy":
         return {
             "status": "healthy",
             "database": "connected",
-            "service": "auth-service"
+            "service": "auth-service",
+            "checked_at": _health_state["checked_at"]
         }
-    except Exception as e:
-        return JSONResponse(
-            status_code=503,
-            content={
-                "status": "unhealthy",
-                "database": "disconnected",
-                "error": str(e),
-                "service": "auth-service"
-            }
-        )
+    
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "unhealthy",
+            "database": "disconnected",
+            "error": _health_state["error"],
+            "service": "auth-service",
+            "checked_at": _health_state["checked_at"]
+        }
+    )
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    print(f"Error no manejado: {exc}")
+    logger.error("Error no manejado en %s %s", request.method, request.url.path, exc_info=exc)
     
     return JSONResponse(
         status_code=500,
@@ -1,5 +1,6 @@
 import uuid
-from sqlalchemy import UUID, Column, DateTime, String, Text
+from sqlalchemy import UUID, Column, DateTime, Index, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 
 from app.models import Base
@@ -14,8 +15,13 @@ class AuditLog(Base):
     resource = Column(String(100), nullable=True)
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(Text, nullable=True)
-    details = Column(Text, nullable=True)
+    details = Column(JSONB(none_as_null=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_audit_logs_user_id_created_at", user_id, created_at.desc()),
+        Index("ix_audit_logs_action_created_at", action, created_at.desc()),
+    )
+    
     def __repr__(self):
         return f"<AuditLog(id={self.id}, action='{self.action}', user_id={self.user_id})>"
\ No newline at end of file
@@ -1,10 +1,12 @@
 
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from uuid import UUID
+from sqlalchemy import func, insert
 
 from app.models.audit_model import AuditLog
+from app.repositories.pagination import paginate
+from app.utils.identifiers import parse_uuid
 
 
 class AuditRepository:
@@ -13,12 +15,21 @@ class AuditRepository:
         self.db = db
     
     def create_audit_log(self, audit_data: dict) -> AuditLog:
-        audit_log = AuditLog(**audit_data)
-        self.db.add(audit_log)
+        audit_log = self.db.execute(
+            insert(AuditLog).values(**audit_data).returning(AuditLog)
+        ).scalar_one()
         self.db.commit()
-        self.db.refresh(audit_log)
         return audit_log
     
+    def bulk_create_audit_logs(self, audit_rows: List[dict]) -> int:
+        """Insertar varios registros en un solo executemany y un solo commit"""
+        if not audit_rows:
+            return 0
+        
+        self.db.execute(insert(AuditLog), audit_rows)
+        self.db.commit()
+        return len(audit_rows)
+    
     def get_audit_logs(
         self, 
         user_id: Optional[str] = None,
@@ -28,44 +39,31 @@ class AuditRepository:
     ) -> dict:
         query = self.db.query(AuditLog)
         
-        if user_id:
-            try:
-                uuid_user_id = UUID(user_id)
-                query = query.filter(AuditLog.user_id == uuid_user_id)
-            except ValueError:
-                pass
+        uuid_user_id = parse_uuid(user_id)
+        if uuid_user_id:
+            query = query.filter(AuditLog.user_id == uuid_user_id)
         
         if action:
             query = query.filter(AuditLog.action == action)
         
         query = query.order_by(AuditLog.created_at.desc())
         
-        total = query.count()
-        
-        offset = (page - 1) * per_page
-        logs = query.offset(offset).limit(per_page).all()
-        
-        return {
-            "items": logs,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": (total + per_page - 1) // per_page
-        }
+        return paginate(query, page, per_page)
     
     def get_user_activity_summary(self, user_id: str, days: int = 30) -> dict:
         """Obtener resumen de actividad del usuario"""
-        try:
-            uuid_user_id = UUID(user_id)
-        except ValueError:
+        uuid_user_id = parse_uuid(user_id)
+        if not uuid_user_id:
             return {"error": "ID de usuario inválido"}
         
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        
         actions_query = self.db.query(
             AuditLog.action,
             func.count(AuditLog.id).label('count')
         ).filter(
             AuditLog.user_id == uuid_user_id,
-            AuditLog.created_at >= func.now() - func.cast(f"{days} days", func.interval)
+            AuditLog.created_at >= since
         ).group_by(AuditLog.action)
         
         actions = actions_query.all()
@@ -85,11 +83,13 @@ class AuditRepository:
     
     def get_system_activity_summary(self, days: int = 7) -> dict:
         """Obtener resumen de actividad del sistema"""
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        
         actions_query = self.db.query(
             AuditLog.action,
             func.count(AuditLog.id).label('count')
         ).filter(
-            AuditLog.created_at >= func.now() - func.cast(f"{days} days", func.interval)
+            AuditLog.created_at >= since
         ).group_by(AuditLog.action)
         
         actions = actions_query.all()
@@ -99,7 +99,7 @@ class AuditRepository:
             func.date(AuditLog.created_at).label('date'),
             func.count(AuditLog.id).label('count')
         ).filter(
-            AuditLog.created_at >= func.now() - func.cast(f"{days} days", func.interval)
+            AuditLog.created_at >= since
         ).group_by(func.date(AuditLog.created_at)).order_by('date')
         
         daily_activity = [
@@ -0,0 +1,29 @@
+"""
+Paginación compartida por los repositorios
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+
+
+def paginate(query: Query, page: int, per_page: int) -> dict:
+    """
+    Obtener la página y el total en un solo round-trip usando COUNT(*) OVER ()
+    Solo se ejecuta un COUNT aparte cuando la página pedida está fuera de rango
+    """
+    offset = (page - 1) * per_page
+    rows = query.add_columns(func.count().over().label("total")).offset(offset).limit(per_page).all()
+
+    if rows:
+        total = rows[0].total
+    elif page > 1:
+        total = query.order_by(None).count()
+    else:
+        total = 0
+
+    return {
+        "items": [row[0] for row in rows],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": (total + per_page - 1) // per_page
+    }
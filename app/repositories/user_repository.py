@@ -1,14 +1,25 @@
 """
 Repositorio para gestión de usuarios
 """
+from datetime import datetime, timezone
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, or_
+from sqlalchemy import Row, and_, exists, func, insert, literal_column, select, update
 from app.models.refresh_token_model import RefreshToken
-from app.models.status_enum import UserStatus
 from app.models.user_model import User
-from app.utils.security import get_password_hash, verify_password
-from uuid import UUID
+from app.repositories.pagination import paginate
+from app.schemas.user import UserStatus
+from app.utils.identifiers import parse_uuid
+from app.utils.security import get_password_hash, hash_token, verify_password
+
+
+_PROTECTED_FIELDS = frozenset({'id', 'cedula', 'password_hash', 'role', 'status', 'created_at'})
+_UPDATABLE_FIELDS = frozenset(User.__table__.columns.keys()) - _PROTECTED_FIELDS
+
+# Debe coincidir con la expresión de ix_users_search_trgm (GIN pg_trgm) para que
+# Postgres use el índice en los ILIKE '%...%' de list_users
+_SEPARATOR = literal_column("' '")
+_SEARCH_DOCUMENT = User.first_name + _SEPARATOR + User.last_name + _SEPARATOR + User.cedula
 
 
 class UserRepository:
@@ -19,92 +30,103 @@ class UserRepository:
     def create_user(self, user_data: dict) -> User:
         user_data['password_hash'] = get_password_hash(user_data.pop('confirm_password'))
         
-        user = User(**user_data)
-        self.db.add(user)
+        user = self.db.execute(insert(User).values(**user_data).returning(User)).scalar_one()
         self.db.commit()
-        self.db.refresh(user)
         return user
     
     def get_user_by_cedula(self, cedula: str) -> Optional[User]:
         return self.db.query(User).filter(User.cedula == cedula).first()
     
     def get_user_by_id(self, user_id: str) -> Optional[User]:
-        try:
-            uuid_user_id = user_id
-            return self.db.query(User).filter(User.id == uuid_user_id).first()
-        except ValueError:
+        """
+        Session.get consulta primero el identity map de la sesión (una por request),
+        así que repetir la búsqueda del mismo usuario no vuelve a la base de datos
+        """
+        uuid_user_id = parse_uuid(user_id)
+        if not uuid_user_id:
             return None
+        
+        return self.db.get(User, uuid_user_id)
     
-    def authenticate_user(self, cedula: str, password: str) -> Optional[User]:
-        user = self.get_user_by_cedula(cedula)
-        if not user:
+    def authenticate_user(self, cedula: str, password: str) -> Optional[Row]:
+        """
+        Validar credenciales leyendo solo las columnas que necesita el login
+        (id, cedula, role) en lugar de hidratar el User completo
+        """
+        credentials = self.db.execute(
+            select(User.id, User.cedula, User.role, User.password_hash)
+            .where(User.cedula == cedula)
+        ).first()
+        if not credentials:
             return None
         
-        if not verify_password(password, user.password_hash):
+        if not verify_password(password, credentials.password_hash):
             return None
         
-        return user
+        return credentials
     
-    def update_user(self, user_id: str, update_data: dict) -> Optional[User]:
-        user = self.get_user_by_id(user_id)
-        if not user:
+    def _update_returning(self, user_id: str, values: dict) -> Optional[User]:
+        """
+        UPDATE ... RETURNING en un solo round-trip, None si el usuario no existe.
+        updated_at se envía explícito porque RETURNING no refresca una instancia
+        que ya esté cargada en la sesión; "fetch" le aplica los valores enviados.
+        """
+        uuid_user_id = parse_uuid(user_id)
+        if not uuid_user_id:
             return None
         
-        protected_fields = ['id', 'cedula', 'password_hash', 'role', 'status', 'created_at']
-        for field in protected_fields:
-            update_data.pop(field, None)
-        
-        for field, value in update_data.items():
-            if hasattr(user, field):
-                setattr(user, field, value)
-        
-        user.updated_at = user.updated_at
-        
+        stmt = (
+            update(User)
+            .where(User.id == uuid_user_id)
+            .values({**values, "updated_at": datetime.now(timezone.utc)})
+            .returning(User)
+            .execution_options(synchronize_session="fetch")
+        )
+        user = self.db.execute(stmt).scalar_one_or_none()
         self.db.commit()
-        self.db.refresh(user)
         return user
     
-    def update_user_status(self, user_id: str, status: UserStatus) -> Optional[User]:
-        user = self.get_user_by_id(user_id)
-        if not user:
-            return None
-        
-        user.status = status
-        user.updated_at = user.updated_at
+    def update_user(self, user_id: str, update_data: dict) -> Optional[User]:
+        values = {
+            field: value for field, value in update_data.items()
+            if field in _UPDATABLE_FIELDS
+        }
+        if not values:
+            return self.get_user_by_id(user_id)
         
-        self.db.commit()
-        self.db.refresh(user)
-        return user
+        return self._update_returning(user_id, values)
+    
+    def update_user_status(self, user_id: str, status: UserStatus) -> Optional[User]:
+        return self._update_returning(user_id, {"status": status})
     
     def verify_user(self, user_id: str) -> Optional[User]:
-        user = self.get_user_by_id(user_id)
-        if not user:
-            return None
-        
-        user.is_verified = True
-        user.status = UserStatus.ACTIVE
-        user.updated_at = user.updated_at
-        
-        self.db.commit()
-        self.db.refresh(user)
-        return user
+        return self._update_returning(user_id, {
+            "is_verified": True,
+            "status": UserStatus.ACTIVE
+        })
     
     def update_last_login(self, user_id: str):
-        user = self.get_user_by_id(user_id)
-        if user:
-            user.last_login = user.updated_at
-            self.db.commit()
+        """Marcar el último login; el commit queda a cargo del llamador"""
+        uuid_user_id = parse_uuid(user_id)
+        if not uuid_user_id:
+            return
+        
+        self.db.execute(
+            update(User).where(User.id == uuid_user_id).values(last_login=func.now())
+            .execution_options(synchronize_session="fetch")
+        )
     
     def delete_user(self, user_id: str) -> bool:
-        user = self.get_user_by_id(user_id)
-        if not user:
+        uuid_user_id = parse_uuid(user_id)
+        if not uuid_user_id:
             return False
         
-        user.status = UserStatus.INACTIVE
-        user.updated_at = user.updated_at
-        
+        result = self.db.execute(
+            update(User).where(User.id == uuid_user_id).values(status=UserStatus.INACTIVE)
+            .execution_options(synchronize_session="fetch")
+        )
         self.db.commit()
-        return True
+        return result.rowcount > 0
     
     def list_users(
         self, 
@@ -123,37 +145,18 @@ class UserRepository:
             query = query.filter(User.role == role)
         
         if search:
-            search_filter = or_(
-                User.first_name.ilike(f"%{search}%"),
-                User.last_name.ilike(f"%{search}%"),
-                User.cedula.ilike(f"%{search}%")
-            )
-            query = query.filter(search_filter)
-        
-        total = query.count()
+            query = query.filter(_SEARCH_DOCUMENT.ilike(f"%{search}%"))
         
-        offset = (page - 1) * per_page
-        users = query.offset(offset).limit(per_page).all()
-        
-        return {
-            "items": users,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": (total + per_page - 1) // per_page
-        }
+        return paginate(query, page, per_page)
     
     def check_cedula_exists(self, cedula: str, exclude_user_id: Optional[str] = None) -> bool:
-        query = self.db.query(User).filter(User.cedula == cedula)
+        condition = exists().where(User.cedula == cedula)
         
-        if exclude_user_id:
-            try:
-                uuid_exclude = UUID(exclude_user_id)
-                query = query.filter(User.id != uuid_exclude)
-            except ValueError:
-                pass
+        uuid_exclude = parse_uuid(exclude_user_id)
+        if uuid_exclude:
+            condition = condition.where(User.id != uuid_exclude)
         
-        return self.db.query(query.exists()).scalar()
+        return self.db.execute(select(condition)).scalar()
 
 
 class RefreshTokenRepository:
@@ -162,30 +165,31 @@ class RefreshTokenRepository:
         self.db = db
     
     def create_refresh_token(self, token_data: dict) -> RefreshToken:
-        """Crear refresh token"""
-        refresh_token = RefreshToken(**token_data)
-        self.db.add(refresh_token)
-        self.db.commit()
-        self.db.refresh(refresh_token)
-        return refresh_token
+        """Crear refresh token; el commit queda a cargo del llamador"""
+        token_data['token_hash'] = hash_token(token_data.pop('token'))
+        
+        return self.db.execute(
+            insert(RefreshToken).values(**token_data).returning(RefreshToken)
+        ).scalar_one()
     
     def get_refresh_token(self, token: str) -> Optional[RefreshToken]:
         return self.db.query(RefreshToken).filter(
             and_(
-                RefreshToken.token == token,
+                RefreshToken.token_hash == hash_token(token),
                 RefreshToken.is_revoked == False,
                 RefreshToken.expires_at > func.now()
             )
         ).first()
     
     def revoke_refresh_token(self, token: str) -> bool:
+        """Revocar refresh token; el commit queda a cargo del llamador"""
         refresh_token = self.db.query(RefreshToken).filter(
-            RefreshToken.token == token
+            RefreshToken.token_hash == hash_token(token)
         ).first()
         
         if refresh_token:
             refresh_token.is_revoked = True
-            self.db.commit()
+            self.db.flush()
             return True
         
         return False
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.config.settings import settings
-from app.database import get_db
+from app.dependencies import get_auth_service, get_client_ip
 from app.schemas.user import (
     UserRegisterRequest, 
     UserLoginRequest, 
@@ -19,10 +19,11 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 security = HTTPBearer()
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """Obtener usuario actual desde token JWT"""
-    auth_service = AuthService(db)
-    
     is_valid, message, token_data = auth_service.verify_token(credentials.credentials)
     
     if not is_valid:
@@ -39,7 +40,8 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
 async def register_user(
     request: Request,
     user_data: UserRegisterRequest,
-    db: Session = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service),
+    ip_address: Optional[str] = Depends(get_client_ip)
 ):
     """
     Registrar nuevo usuario con:
@@ -48,12 +50,10 @@ async def register_user(
     - Foto de perfil y documentos se subirán por separado
     """
     try:
-        auth_service = AuthService(db)
-        
-        ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
         
-        success, message, data = auth_service.register_user(
+        success, message, data = await run_in_threadpool(
+            auth_service.register_user,
             user_data=user_data,
             ip_address=ip_address,
             user_agent=user_agent
@@ -84,19 +84,18 @@ async def register_user(
 async def login_user(
     request: Request,
     login_data: UserLoginRequest,
-    db: Session = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service),
+    ip_address: Optional[str] = Depends(get_client_ip)
 ):
     """
     Login de usuario con cédula y contraseña
     Retorna access token y refresh token
     """
     try:
-        auth_service = AuthService(db)
-        
-        ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
         
-        success, message, token_response = auth_service.login_user(
+        success, message, token_response = await run_in_threadpool(
+            auth_service.login_user,
             login_data=login_data,
             ip_address=ip_address,
             user_agent=user_agent
@@ -111,7 +110,7 @@ async def login_user(
         return ApiResponse(
             success=True,
             message=message,
-            data=token_response.dict()
+            data=token_response.model_dump()
         )
         
     except HTTPException:
@@ -125,19 +124,16 @@ async def login_user(
 
 @router.post("/refresh", response_model=ApiResponse, summary="Renovar access token")
 async def refresh_token(
-    request: Request,
     refresh_data: RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service),
+    ip_address: Optional[str] = Depends(get_client_ip)
 ):
     """
     Renovar access token usando refresh token
     """
     try:
-        auth_service = AuthService(db)
-        
-        ip_address = request.client.host if request.client else None
-        
-        success, message, token_response = auth_service.refresh_access_token(
+        success, message, token_response = await run_in_threadpool(
+            auth_service.refresh_access_token,
             refresh_token=refresh_data.refresh_token,
             ip_address=ip_address
         )
@@ -151,7 +147,7 @@ async def refresh_token(
         return ApiResponse(
             success=True,
             message=message,
-            data=token_response.dict()
+            data=token_response.model_dump()
         )
         
     except HTTPException:
@@ -168,15 +164,14 @@ async def logout_user(
     request: Request,
     refresh_data: Optional[RefreshTokenRequest] = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service),
+    ip_address: Optional[str] = Depends(get_client_ip)
 ):
     """
     Logout de usuario
     Revoca refresh token y marca sesión como cerrada
     """
     try:
-        auth_service = AuthService(db)
-        
         auth_header = request.headers.get("authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
             raise HTTPException(
@@ -187,9 +182,8 @@ async def logout_user(
         access_token = auth_header.split(" ")[1]
         refresh_token = refresh_data.refresh_token if refresh_data else None
         
-        ip_address = request.client.host if request.client else None
-        
-        success, message = auth_service.logout_user(
+        success, message = await run_in_threadpool(
+            auth_service.logout_user,
             access_token=access_token,
             refresh_token=refresh_token,
             ip_address=ip_address
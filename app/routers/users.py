@@ -1,28 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+import sys
 from typing import Optional
 
 from app.config.settings import settings
-from app.database import get_db
+from app.dependencies import get_auth_service, get_client_ip, get_user_service
 from app.schemas.user import (
     UserUpdateRequest, 
     ApiResponse, 
+    UserRole,
     UserStatus
 )
+from app.services.auth_service import AuthService
 from app.services.user_service import UserService
 from app.services.file_service import FileService
 
 router = APIRouter(prefix="/users", tags=["users"])
 security = HTTPBearer()
 
+_ADMIN_ROLE = sys.intern(UserRole.ADMIN.value)
 
-def get_current_user_data(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+
+def _api_response(message: str, data: Optional[dict] = None) -> ORJSONResponse:
+    """
+    Respuesta exitosa serializada directamente con orjson; al retornar un Response
+    FastAPI no vuelve a validar el contenido contra response_model (solo documenta)
+    """
+    return ORJSONResponse({"success": True, "message": message, "data": data, "error": None})
+
+
+async def get_current_user_data(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """Obtener datos del usuario actual desde token JWT"""
-    from app.services.auth_service import AuthService
-    
-    auth_service = AuthService(db)
-    is_valid, message, token_data = auth_service.verify_token(credentials.credentials)
+    is_valid, message, token_data = await run_in_threadpool(auth_service.verify_token, credentials.credentials)
     
     if not is_valid:
         raise HTTPException(
@@ -34,9 +48,9 @@ def get_current_user_data(credentials: HTTPAuthorizationCredentials = Depends(se
     return token_data
 
 
-def require_admin(current_user: dict = Depends(get_current_user_data)):
+async def require_admin(current_user: dict = Depends(get_current_user_data)):
     """Requerir rol de administrador"""
-    if current_user.get("role") != "admin":
+    if current_user["role"] != _ADMIN_ROLE:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Se requiere rol de administrador"
@@ -47,15 +61,13 @@ def require_admin(current_user: dict = Depends(get_current_user_data)):
 @router.get("/me", response_model=ApiResponse, summary="Obtener perfil del usuario actual")
 async def get_current_user_profile(
     current_user: dict = Depends(get_current_user_data),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """
     Obtener perfil del usuario autenticado
     """
     try:
-        user_service = UserService(db)
-        
-        success, message, profile = user_service.get_user_profile(current_user["sub"])
+        success, message, profile = await run_in_threadpool(user_service.get_user_profile, current_user["sub"])
         
         if not success:
             raise HTTPException(
@@ -63,11 +75,7 @@ async def get_current_user_profile(
                 detail=message
             )
         
-        return ApiResponse(
-            success=True,
-            message=message,
-            data=profile.dict()
-        )
+        return _api_response(message, profile.model_dump(mode="json"))
         
     except HTTPException:
         raise
@@ -80,20 +88,17 @@ async def get_current_user_profile(
 
 @router.put("/me", response_model=ApiResponse, summary="Actualizar perfil del usuario")
 async def update_current_user_profile(
-    request: Request,
     update_data: UserUpdateRequest,
     current_user: dict = Depends(get_current_user_data),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service),
+    ip_address: Optional[str] = Depends(get_client_ip)
 ):
     """
     Actualizar datos del perfil del usuario actual
     """
     try:
-        user_service = UserService(db)
-        
-        ip_address = request.client.host if request.client else None
-        
-        success, message, profile = user_service.update_user_profile(
+        success, message, profile = await run_in_threadpool(
+            user_service.update_user_profile,
             user_id=current_user["sub"],
             update_data=update_data,
             ip_address=ip_address
@@ -105,11 +110,7 @@ async def update_current_user_profile(
                 detail=message
             )
         
-        return ApiResponse(
-            success=True,
-            message=message,
-            data=profile.dict()
-        )
+        return _api_response(message, profile.model_dump(mode="json"))
         
     except HTTPException:
         raise
@@ -122,12 +123,12 @@ async def update_current_user_profile(
 
 @router.post("/me/upload-photos", response_model=ApiResponse, summary="Subir fotos de usuario")
 async def upload_user_photos(
-    request: Request,
     profile_photo: Optional[UploadFile] = File(None, description="Foto de perfil"),
     document_front: Optional[UploadFile] = File(None, description="Documento de identidad frontal"),
     document_back: Optional[UploadFile] = File(None, description="Documento de identidad posterior"),
     current_user: dict = Depends(get_current_user_data),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service),
+    ip_address: Optional[str] = Depends(get_client_ip)
 ):
     """
     Subir fotos de perfil y documentos de identidad
@@ -139,27 +140,6 @@ async def upload_user_photos(
                 detail="Se debe subir al menos una imagen"
             )
         
-        ip_address = request.client.host if request.client else None
-        
-        files_to_upload = []
-        if profile_photo:
-            is_valid, message = FileService.validate_file_upload(profile_photo)
-            if not is_valid:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
-            files_to_upload.append(("profile_photo", profile_photo))
-        
-        if document_front:
-            is_valid, message = FileService.validate_file_upload(document_front)
-            if not is_valid:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
-            files_to_upload.append(("document_front", document_front))
-        
-        if document_back:
-            is_valid, message = FileService.validate_file_upload(document_back)
-            if not is_valid:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
-            files_to_upload.append(("document_back", document_back))
-        
         success, message, urls = await FileService.upload_document_images(
             profile_photo=profile_photo,
             document_front=document_front,
@@ -174,8 +154,8 @@ async def upload_user_photos(
                 detail=message
             )
         
-        user_service = UserService(db)
-        success, message, updated_user = user_service.update_user_images(
+        success, message, updated_user = await run_in_threadpool(
+            user_service.update_user_images,
             user_id=current_user["sub"],
             image_urls=urls,
             ip_address=ip_address
@@ -187,14 +167,10 @@ async def upload_user_photos(
                 detail=message
             )
         
-        return ApiResponse(
-            success=True,
-            message="Fotos subidas exitosamente",
-            data={
-                "uploaded_files": urls,
-                "user": updated_user.dict()
-            }
-        )
+        return _api_response("Fotos subidas exitosamente", {
+            "uploaded_files": urls,
+            "user": updated_user.model_dump(mode="json")
+        })
         
     except HTTPException:
         raise
@@ -209,16 +185,15 @@ async def upload_user_photos(
 async def get_user_by_id(
     user_id: str,
     current_user: dict = Depends(get_current_user_data),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """
     Obtener datos completos de un usuario
     Solo disponible para el mismo usuario o administradores
     """
     try:
-        user_service = UserService(db)
-        
-        success, message, user = user_service.get_user_full_data(
+        success, message, user = await run_in_threadpool(
+            user_service.get_user_full_data,
             user_id=user_id,
             requesting_user_id=current_user["sub"],
             requesting_user_role=current_user["role"]
@@ -230,11 +205,7 @@ async def get_user_by_id(
                 detail=message
             )
         
-        return ApiResponse(
-            success=True,
-            message=message,
-            data=user.dict()
-        )
+        return _api_response(message, user.model_dump(mode="json"))
         
     except HTTPException:
         raise
@@ -247,21 +218,18 @@ async def get_user_by_id(
 
 @router.put("/{user_id}/status", response_model=ApiResponse, summary="Actualizar estado de usuario")
 async def update_user_status(
-    request: Request,
     user_id: str,
     status: UserStatus,
     current_admin: dict = Depends(require_admin),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service),
+    ip_address: Optional[str] = Depends(get_client_ip)
 ):
     """
     Actualizar estado de un usuario (solo administradores)
     """
     try:
-        user_service = UserService(db)
-        
-        ip_address = request.client.host if request.client else None
-        
-        success, message, user = user_service.update_user_status(
+        success, message, user = await run_in_threadpool(
+            user_service.update_user_status,
             user_id=user_id,
             status=status,
             admin_user_id=current_admin["sub"],
@@ -274,11 +242,7 @@ async def update_user_status(
                 detail=message
             )
         
-        return ApiResponse(
-            success=True,
-            message=message,
-            data=user.dict()
-        )
+        return _api_response(message, user.model_dump(mode="json"))
         
     except HTTPException:
         raise
@@ -291,20 +255,17 @@ async def update_user_status(
 
 @router.post("/{user_id}/verify", response_model=ApiResponse, summary="Verificar usuario")
 async def verify_user(
-    request: Request,
     user_id: str,
     current_admin: dict = Depends(require_admin),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service),
+    ip_address: Optional[str] = Depends(get_client_ip)
 ):
     """
     Verificar un usuario (solo administradores)
     """
     try:
-        user_service = UserService(db)
-        
-        ip_address = request.client.host if request.client else None
-        
-        success, message, user = user_service.verify_user(
+        success, message, user = await run_in_threadpool(
+            user_service.verify_user,
             user_id=user_id,
             admin_user_id=current_admin["sub"],
             ip_address=ip_address
@@ -316,11 +277,7 @@ async def verify_user(
                 detail=message
             )
         
-        return ApiResponse(
-            success=True,
-            message=message,
-            data=user.dict()
-        )
+        return _api_response(message, user.model_dump(mode="json"))
         
     except HTTPException:
         raise
@@ -333,20 +290,17 @@ async def verify_user(
 
 @router.delete("/{user_id}", response_model=ApiResponse, summary="Eliminar usuario")
 async def delete_user(
-    request: Request,
     user_id: str,
     current_admin: dict = Depends(require_admin),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service),
+    ip_address: Optional[str] = Depends(get_client_ip)
 ):
     """
     Eliminar un usuario (soft delete - solo administradores)
     """
     try:
-        user_service = UserService(db)
-        
-        ip_address = request.client.host if request.client else None
-        
-        success, message = user_service.delete_user(
+        success, message = await run_in_threadpool(
+            user_service.delete_user,
             user_id=user_id,
             admin_user_id=current_admin["sub"],
             ip_address=ip_address
@@ -358,10 +312,7 @@ async def delete_user(
                 detail=message
             )
         
-        return ApiResponse(
-            success=True,
-            message=message
-        )
+        return _api_response(message)
         
     except HTTPException:
         raise
@@ -380,15 +331,14 @@ async def list_users(
     role: Optional[str] = None,
     search: Optional[str] = None,
     current_admin: dict = Depends(require_admin),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """
     Listar usuarios con filtros (solo administradores)
     """
     try:
-        user_service = UserService(db)
-        
-        success, message, paginated_response = user_service.list_users(
+        success, message, paginated_response = await run_in_threadpool(
+            user_service.list_users,
             page=page,
             per_page=per_page,
             status=status,
@@ -402,11 +352,7 @@ async def list_users(
                 detail=message
             )
         
-        return ApiResponse(
-            success=True,
-            message=message,
-            data=paginated_response.dict()
-        )
+        return _api_response(message, paginated_response.model_dump(mode="json"))
         
     except HTTPException:
         raise
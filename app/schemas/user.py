@@ -1,3 +1,4 @@
+import re
 from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field, validator
 from typing import Optional
@@ -5,6 +6,19 @@ from datetime import datetime
 from enum import Enum
 
 
+_CEDULA_STRIP = str.maketrans('', '', '- ')
+_PHONE_STRIP = str.maketrans('', '', '-() ')
+_PHONE_DIGITS = re.compile(r'^\d{7,20}$')
+
+
+def _clean_phone(v: str) -> str:
+    """Quitar separadores del teléfono y validar que queden entre 7 y 20 dígitos"""
+    phone_clean = v.translate(_PHONE_STRIP)
+    if not _PHONE_DIGITS.fullmatch(phone_clean):
+        raise ValueError('Formato de teléfono inválido')
+    return phone_clean
+
+
 class UserRole(str, Enum):
     """Roles de usuario"""
     CUSTOMER = "customer"
@@ -30,17 +44,14 @@ class UserBase(BaseModel):
     
     @validator('cedula')
     def validate_cedula(cls, v):
-        cedula_clean = v.replace('-', '').replace(' ', '')
+        cedula_clean = v.translate(_CEDULA_STRIP)
         if not cedula_clean.isdigit():
             raise ValueError('La cédula debe contener solo números')
         return cedula_clean
     
     @validator('phone')
     def validate_phone(cls, v):
-        phone_clean = v.replace('-', '').replace('(', '').replace(')', '').replace(' ', '')
-        if not phone_clean.isdigit() or len(phone_clean) < 7:
-            raise ValueError('Formato de teléfono inválido')
-        return phone_clean
+        return _clean_phone(v)
 
 
 class UserRegisterRequest(UserBase):
@@ -157,7 +168,5 @@ class UserUpdateRequest(BaseModel):
     @validator('phone')
     def validate_phone(cls, v):
         if v:
-            phone_clean = v.replace('-', '').replace('(', '').replace(')', '').replace(' ', '')
-            if not phone_clean.isdigit() or len(phone_clean) < 7:
-                raise ValueError('Formato de teléfono inválido')
+            return _clean_phone(v)
         return v
\ No newline at end of file
@@ -1,16 +1,34 @@
 """
 Servicio de autenticación
 """
+import sys
+import threading
+import time
 from typing import Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from cachetools import TTLCache
 from sqlalchemy.orm import Session
 from app.repositories import UserRepository, RefreshTokenRepository
 from app.schemas.user import UserRegisterRequest, UserLoginRequest, TokenResponse
-from app.utils.security import create_access_token, create_refresh_token, verify_token
+from app.services.user_service import invalidate_users_list_cache
+from app.utils.security import create_access_token, create_refresh_token, hash_token, verify_token
 from app.utils.audit import AuditLogger
 from app.config.settings import settings
 
 
+# Tokens de acceso ya verificados (firma + usuario existente), por sha256 del token
+_token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.TOKEN_CACHE_TTL)
+_token_cache_lock = threading.Lock()
+
+_MAX_TOKEN_LENGTH = 4096
+
+_REFRESH_TOKEN_TTL_SECONDS = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+
+def _refresh_token_expires_at() -> datetime:
+    return datetime.fromtimestamp(int(time.time()) + _REFRESH_TOKEN_TTL_SECONDS, tz=timezone.utc)
+
+
 class AuthService:
     
     def __init__(self, db: Session):
@@ -26,6 +44,7 @@ class AuthService:
             user_dict = user_data.model_dump(exclude={"password"})
             
             user = self.user_repo.create_user(user_dict)
+            invalidate_users_list_cache()
             
             AuditLogger.log_action(
                 user_id=str(user.id),
@@ -39,7 +58,7 @@ class AuthService:
             return True, "Usuario registrado exitosamente", {"user_id": str(user.id)}
             
         except Exception as e:
-            return False, f"Error registrando usuario: {str(e)} {str(user_dict)}", None
+            return False, f"Error registrando usuario: {str(e)}", None
     
     def login_user(self, login_data: UserLoginRequest, ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> Tuple[bool, str, Optional[TokenResponse]]:
         try:
@@ -56,28 +75,30 @@ class AuthService:
                 )
                 return False, "Cédula o contraseña incorrecta", None
             
+            uid = str(user.id)
+            role = user.role.value
             
             access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
             access_token = create_access_token(
-                data={"sub": str(user.id), "cedula": user.cedula, "role": user.role.value},
+                data={"sub": uid, "cedula": user.cedula, "role": role},
                 expires_delta=access_token_expires
             )
             
-            refresh_token = create_refresh_token(data={"sub": str(user.id)})
+            refresh_token = create_refresh_token(data={"sub": uid})
             
             token_data = {
                 "user_id": user.id,
                 "token": refresh_token,
-                "expires_at": datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+                "expires_at": _refresh_token_expires_at(),
                 "created_by_ip": ip_address
             }
             
             self.refresh_repo.create_refresh_token(token_data)
-            
-            self.user_repo.update_last_login(str(user.id))
+            self.user_repo.update_last_login(uid)
+            self.db.commit()
             
             AuditLogger.log_action(
-                user_id=str(user.id),
+                user_id=uid,
                 action="login",
                 resource="user",
                 details={"cedula": user.cedula},
@@ -111,23 +132,26 @@ class AuthService:
             if not user:
                 return False, "Usuario no encontrado", None
             
+            uid = str(user.id)
+            
             access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
             new_access_token = create_access_token(
-                data={"sub": str(user.id), "cedula": user.cedula, "role": user.role.value},
+                data={"sub": uid, "cedula": user.cedula, "role": user.role.value},
                 expires_delta=access_token_expires
             )
             
-            new_refresh_token = create_refresh_token(data={"sub": str(user.id)})
+            new_refresh_token = create_refresh_token(data={"sub": uid})
             
             self.refresh_repo.revoke_refresh_token(refresh_token)
             token_data = {
                 "user_id": user.id,
                 "token": new_refresh_token,
-                "expires_at": datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+                "expires_at": _refresh_token_expires_at(),
                 "created_by_ip": ip_address
             }
             
             self.refresh_repo.create_refresh_token(token_data)
+            self.db.commit()
             
             token_response = TokenResponse(
                 access_token=new_access_token,
@@ -151,6 +175,7 @@ class AuthService:
             
             if refresh_token:
                 self.refresh_repo.revoke_refresh_token(refresh_token)
+                self.db.commit()
             
             
             AuditLogger.log_action(
@@ -167,6 +192,16 @@ class AuthService:
     
     def verify_token(self, token: str) -> Tuple[bool, Optional[str], Optional[dict]]:
         try:
+            if token.count(".") != 2 or len(token) > _MAX_TOKEN_LENGTH:
+                return False, "Token inválido", None
+            
+            cache_key = hash_token(token)
+            with _token_cache_lock:
+                cached_data = _token_cache.get(cache_key)
+            
+            if cached_data and cached_data["exp"] > time.time():
+                return True, "Token válido", cached_data
+            
             token_data = verify_token(token, "access")
             if not token_data:
                 return False, "Token inválido o expirado", None
@@ -177,6 +212,13 @@ class AuthService:
             if not user:
                 return False, "Usuario no encontrado", None
             
+            # El rol se interna una sola vez: las comparaciones posteriores (require_admin)
+            # resuelven por identidad, y en hits de caché se reutiliza este mismo dict
+            token_data["role"] = sys.intern(token_data["role"])
+            
+            with _token_cache_lock:
+                _token_cache[cache_key] = token_data
+            
             return True, "Token válido", token_data
             
         except Exception as e:
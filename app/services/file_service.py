@@ -1,52 +1,94 @@
-from typing import Tuple, Optional
+import asyncio
+import os
+import weakref
+from typing import List, Optional, Tuple
 from fastapi import UploadFile, HTTPException
-from app.utils.storage import storage_manager, FileValidator
+from fastapi.concurrency import run_in_threadpool
+from app.config.settings import settings
+from app.utils.storage import storage_manager, FileValidator, HashingReader
 from app.utils.audit import AuditLogger
 
 
+_ALLOWED_EXT = frozenset({".jpg", ".jpeg", ".png", ".webp"})
+_ALLOWED_EXT_LABEL = ", ".join(sorted(_ALLOWED_EXT))
+
+# Cada subida ocupa un hilo del threadpool durante todo el envío a GCS;
+# el límite evita que las subidas acaparen los hilos del resto de endpoints.
+# Un asyncio.Semaphore queda ligado al primer loop que espera en él, así que
+# se crea uno por event loop (uno por ciclo de vida de la aplicación)
+_upload_semaphores = weakref.WeakKeyDictionary()
+
+
+def _upload_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _upload_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _upload_semaphores[loop] = asyncio.Semaphore(settings.MAX_CONCURRENT_UPLOADS)
+    return semaphore
+
+
+def _file_size(file: UploadFile) -> int:
+    """Tamaño del archivo sin leer su contenido en memoria"""
+    if file.size is not None:
+        return file.size
+    
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
 class FileService:
     
     @staticmethod
-    async def upload_user_photo(
+    async def _validate_photo(file: UploadFile) -> Tuple[bool, str, int]:
+        """Validar extensión, tamaño y firma del archivo sin subirlo; devuelve el tamaño"""
+        is_valid, error_message = FileService.validate_file_upload(file)
+        if not is_valid:
+            return False, error_message, 0
+        
+        size = _file_size(file)
+        header = await file.read(FileValidator.HEADER_SIZE)
+        await file.seek(0)
+        
+        is_valid, error_message = FileValidator.validate_image(size, file.content_type, header)
+        return is_valid, error_message, size
+    
+    @staticmethod
+    async def _store_photo(
         file: UploadFile,
         file_type: str,
-        user_id: str,
-        ip_address: Optional[str] = None
-    ) -> Tuple[bool, str, Optional[str]]:
-
+        size: int
+    ) -> Tuple[bool, str, Optional[str], Optional[dict]]:
+        """
+        Subir un archivo ya validado. No registra auditoría: devuelve los detalles
+        del archivo para que upload_document_images escriba un único registro
+        """
         try:
-            file_content = await file.read()
-            is_valid, error_message = FileValidator.validate_image(file_content, file.content_type)
-            
-            if not is_valid:
-                return False, error_message, None
-            
-            success, url_or_error = storage_manager.upload_file(
-                file_content, 
-                file.filename, 
-                file.content_type
-            )
+            reader = HashingReader(file.file)
+            async with _upload_semaphore():
+                success, url_or_error = await run_in_threadpool(
+                    storage_manager.upload_file,
+                    reader,
+                    file.filename, 
+                    file.content_type
+                )
             
             if not success:
-                return False, url_or_error, None
+                return False, url_or_error, None, None
             
-            AuditLogger.log_action(
-                user_id=user_id,
-                action="file_upload",
-                resource="user_photo",
-                details={
-                    "file_type": file_type,
-                    "original_filename": file.filename,
-                    "content_type": file.content_type,
-                    "size": len(file_content)
-                },
-                ip_address=ip_address
-            )
+            file_details = {
+                "file_type": file_type,
+                "original_filename": file.filename,
+                "content_type": file.content_type,
+                "size": size,
+                "sha256": reader.hexdigest()
+            }
             
-            return True, "Archivo subido exitosamente", url_or_error
+            return True, "Archivo subido exitosamente", url_or_error, file_details
             
         except Exception as e:
-            return False, f"Error subiendo archivo: {str(e)}", None
+            return False, f"Error subiendo archivo: {str(e)}", None, None
     
     @staticmethod
     async def upload_document_images(
@@ -58,34 +100,30 @@ class FileService:
     ) -> Tuple[bool, str, dict]:
 
         try:
-            urls = {}
-            
-            if profile_photo:
-                success, message, url = await FileService.upload_user_photo(
-                    profile_photo, "profile", user_id, ip_address
-                )
-                if success:
-                    urls["profile_photo_url"] = url
-                else:
-                    return False, f"Error subiendo foto de perfil: {message}", {}
-            
-            if document_front:
-                success, message, url = await FileService.upload_user_photo(
-                    document_front, "document_front", user_id, ip_address
+            uploads = [
+                (url_field, file_type, label, file)
+                for url_field, file_type, label, file in (
+                    ("profile_photo_url", "profile", "foto de perfil", profile_photo),
+                    ("document_front_url", "document_front", "documento frontal", document_front),
+                    ("document_back_url", "document_back", "documento posterior", document_back)
                 )
-                if success:
-                    urls["document_front_url"] = url
-                else:
-                    return False, f"Error subiendo documento frontal: {message}", {}
-            
-            if document_back:
-                success, message, url = await FileService.upload_user_photo(
-                    document_back, "document_back", user_id, ip_address
-                )
-                if success:
-                    urls["document_back_url"] = url
-                else:
-                    return False, f"Error subiendo documento posterior: {message}", {}
+                if file
+            ]
+            
+            # Todos los archivos se validan antes de subir cualquiera: si uno es
+            # inválido no deben quedar copias públicas de los demás en el bucket
+            sizes, errors = await FileService._validate_uploads(uploads)
+            if errors:
+                return False, "; ".join(errors), {}
+            
+            results = await asyncio.gather(*(
+                FileService._store_photo(file, file_type, size)
+                for (_, file_type, _, file), size in zip(uploads, sizes)
+            ), return_exceptions=True)
+            
+            urls, files, errors = FileService._collect_upload_results(uploads, results)
+            if errors:
+                return False, "; ".join(errors), {}
             
             if not urls:
                 return False, "No se subieron archivos", {}
@@ -96,7 +134,8 @@ class FileService:
                 resource="user_documents",
                 details={
                     "uploaded_files": list(urls.keys()),
-                    "files_count": len(urls)
+                    "files_count": len(urls),
+                    "files": files
                 },
                 ip_address=ip_address
             )
@@ -106,6 +145,39 @@ class FileService:
         except Exception as e:
             return False, f"Error subiendo documentos: {str(e)}", {}
     
+    @staticmethod
+    async def _validate_uploads(uploads: List[tuple]) -> Tuple[List[int], List[str]]:
+        """Validar todos los archivos; devuelve sus tamaños y los errores encontrados"""
+        sizes = []
+        errors = []
+        for _, _, label, file in uploads:
+            is_valid, message, size = await FileService._validate_photo(file)
+            if not is_valid:
+                errors.append(f"Error subiendo {label}: {message}")
+            sizes.append(size)
+        
+        return sizes, errors
+    
+    @staticmethod
+    def _collect_upload_results(uploads: List[tuple], results: list) -> Tuple[dict, List[dict], List[str]]:
+        """Separar las URLs y detalles de las subidas exitosas de los errores"""
+        urls = {}
+        files = []
+        errors = []
+        for (url_field, _, label, _), result in zip(uploads, results):
+            if isinstance(result, BaseException):
+                errors.append(f"Error subiendo {label}: {str(result)}")
+                continue
+            
+            success, message, url, file_details = result
+            if not success:
+                errors.append(f"Error subiendo {label}: {message}")
+                continue
+            urls[url_field] = url
+            files.append(file_details)
+        
+        return urls, files, errors
+    
     @staticmethod
     def validate_file_upload(file: UploadFile) -> Tuple[bool, str]:
 
@@ -113,14 +185,10 @@ class FileService:
             if not file.filename:
                 return False, "Nombre de archivo requerido"
             
-            if file.size and file.size > 5 * 1024 * 1024:  # 5MB
-                return False, "Archivo demasiado grande (máximo 5MB)"
-            
-            allowed_extensions = ['.jpg', '.jpeg', '.png', '.webp']
-            file_extension = file.filename.lower().split('.')[-1]
+            file_extension = os.path.splitext(file.filename)[1].lower()
             
-            if f'.{file_extension}' not in allowed_extensions:
-                return False, f"Tipo de archivo no permitido. Extensiones permitidas: {', '.join(allowed_extensions)}"
+            if file_extension not in _ALLOWED_EXT:
+                return False, f"Tipo de archivo no permitido. Extensiones permitidas: {_ALLOWED_EXT_LABEL}"
             
             return True, "Archivo válido"
             
@@ -1,10 +1,33 @@
+import threading
 from typing import Optional, Tuple, List
+from cachetools import TTLCache
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
+from app.config.settings import settings
 from app.repositories import UserRepository
 from app.schemas.user import UserResponse, UserProfileResponse, UserUpdateRequest, PaginatedResponse, UserStatus
 from app.utils.audit import AuditLogger
 
 
+# Páginas de list_users por filtros. La generación forma parte de la clave: al invalidar
+# se incrementa, y un resultado calculado antes de la mutación nunca vuelve a leerse
+_users_list_cache = TTLCache(maxsize=settings.USERS_LIST_CACHE_MAXSIZE, ttl=settings.USERS_LIST_CACHE_TTL)
+_users_list_lock = threading.Lock()
+_users_list_generation = 0
+
+_users_adapter = TypeAdapter(List[UserResponse])
+
+_IMAGE_FIELDS = frozenset({"profile_photo_url", "document_front_url", "document_back_url"})
+
+
+def invalidate_users_list_cache():
+    """Descartar las páginas cacheadas tras crear o modificar usuarios"""
+    global _users_list_generation
+    with _users_list_lock:
+        _users_list_generation += 1
+        _users_list_cache.clear()
+
+
 class UserService:
     
     def __init__(self, db: Session):
@@ -17,13 +40,7 @@ class UserService:
             if not user:
                 return False, "Usuario no encontrado", None
             
-            profile_data = user.__dict__.copy()
-            if 'document_front_url' in profile_data:
-                profile_data.pop('document_front_url', None)
-            if 'document_back_url' in profile_data:
-                profile_data.pop('document_back_url', None)
-            
-            profile_response = UserProfileResponse(**profile_data)
+            profile_response = UserProfileResponse.model_validate(user)
             return True, "Perfil obtenido exitosamente", profile_response
             
         except Exception as e:
@@ -38,7 +55,7 @@ class UserService:
             if not user:
                 return False, "Usuario no encontrado", None
             
-            user_response = UserResponse.from_orm(user)
+            user_response = UserResponse.model_validate(user)
             return True, "Usuario obtenido exitosamente", user_response
             
         except Exception as e:
@@ -51,18 +68,13 @@ class UserService:
         ip_address: Optional[str] = None
     ) -> Tuple[bool, str, Optional[UserProfileResponse]]:
         try:
-            existing_user = self.user_repo.get_user_by_id(user_id)
-            if not existing_user:
-                return False, "Usuario no encontrado", None
-            
-            if update_data.cedula and self.user_repo.check_cedula_exists(update_data.cedula, exclude_user_id=user_id):
-                return False, "La cédula ya está registrada", None
-            
             user_dict = update_data.dict(exclude_unset=True)
             updated_user = self.user_repo.update_user(user_id, user_dict)
             
             if not updated_user:
-                return False, "Error actualizando usuario", None
+                return False, "Usuario no encontrado", None
+            
+            invalidate_users_list_cache()
             
             AuditLogger.log_action(
                 user_id=user_id,
@@ -72,7 +84,7 @@ class UserService:
                 ip_address=ip_address
             )
             
-            profile_response = UserProfileResponse.from_orm(updated_user)
+            profile_response = UserProfileResponse.model_validate(updated_user)
             return True, "Perfil actualizado exitosamente", profile_response
             
         except Exception as e:
@@ -86,14 +98,7 @@ class UserService:
     ) -> Tuple[bool, str, Optional[UserResponse]]:
         """Actualizar URLs de imágenes del usuario"""
         try:
-            user = self.user_repo.get_user_by_id(user_id)
-            if not user:
-                return False, "Usuario no encontrado", None
-            
-            update_data = {}
-            for field, url in image_urls.items():
-                if field in ['profile_photo_url', 'document_front_url', 'document_back_url']:
-                    update_data[field] = url
+            update_data = {field: image_urls[field] for field in image_urls.keys() & _IMAGE_FIELDS}
             
             if not update_data:
                 return False, "No hay imágenes para actualizar", None
@@ -101,7 +106,9 @@ class UserService:
             updated_user = self.user_repo.update_user(user_id, update_data)
             
             if not updated_user:
-                return False, "Error actualizando imágenes", None
+                return False, "Usuario no encontrado", None
+            
+            invalidate_users_list_cache()
             
             AuditLogger.log_action(
                 user_id=user_id,
@@ -111,7 +118,7 @@ class UserService:
                 ip_address=ip_address
             )
             
-            user_response = UserResponse.from_orm(updated_user)
+            user_response = UserResponse.model_validate(updated_user)
             return True, "Imágenes actualizadas exitosamente", user_response
             
         except Exception as e:
@@ -120,14 +127,12 @@ class UserService:
     def verify_user(self, user_id: str, admin_user_id: str, ip_address: Optional[str] = None) -> Tuple[bool, str, Optional[UserResponse]]:
         """Verificar usuario (solo admin)"""
         try:
-            user = self.user_repo.get_user_by_id(user_id)
-            if not user:
-                return False, "Usuario no encontrado", None
-            
             verified_user = self.user_repo.verify_user(user_id)
             
             if not verified_user:
-                return False, "Error verificando usuario", None
+                return False, "Usuario no encontrado", None
+            
+            invalidate_users_list_cache()
             
             AuditLogger.log_action(
                 user_id=user_id,
@@ -137,7 +142,7 @@ class UserService:
                 ip_address=ip_address
             )
             
-            user_response = UserResponse.from_orm(verified_user)
+            user_response = UserResponse.model_validate(verified_user)
             return True, "Usuario verificado exitosamente", user_response
             
         except Exception as e:
@@ -151,14 +156,12 @@ class UserService:
         ip_address: Optional[str] = None
     ) -> Tuple[bool, str, Optional[UserResponse]]:
         try:
-            user = self.user_repo.get_user_by_id(user_id)
-            if not user:
-                return False, "Usuario no encontrado", None
-            
             updated_user = self.user_repo.update_user_status(user_id, status)
             
             if not updated_user:
-                return False, "Error actualizando estado", None
+                return False, "Usuario no encontrado", None
+            
+            invalidate_users_list_cache()
             
             AuditLogger.log_action(
                 user_id=user_id,
@@ -171,7 +174,7 @@ class UserService:
                 ip_address=ip_address
             )
             
-            user_response = UserResponse.from_orm(updated_user)
+            user_response = UserResponse.model_validate(updated_user)
             return True, "Estado actualizado exitosamente", user_response
             
         except Exception as e:
@@ -186,6 +189,13 @@ class UserService:
         search: Optional[str] = None
     ) -> Tuple[bool, str, Optional[PaginatedResponse]]:
         try:
+            with _users_list_lock:
+                cache_key = (_users_list_generation, page, per_page, status, role, search)
+                cached_response = _users_list_cache.get(cache_key)
+            
+            if cached_response is not None:
+                return True, "Usuarios obtenidos exitosamente", cached_response
+            
             result = self.user_repo.list_users(
                 page=page,
                 per_page=per_page,
@@ -194,7 +204,7 @@ class UserService:
                 search=search
             )
             
-            users_response = [UserResponse.from_orm(user) for user in result["items"]]
+            users_response = _users_adapter.validate_python(result["items"], from_attributes=True)
             
             paginated_response = PaginatedResponse(
                 items=users_response,
@@ -204,6 +214,9 @@ class UserService:
                 pages=result["pages"]
             )
             
+            with _users_list_lock:
+                _users_list_cache[cache_key] = paginated_response
+            
             return True, "Usuarios obtenidos exitosamente", paginated_response
             
         except Exception as e:
@@ -211,13 +224,11 @@ class UserService:
     
     def delete_user(self, user_id: str, admin_user_id: str, ip_address: Optional[str] = None) -> Tuple[bool, str]:
         try:
-            user = self.user_repo.get_user_by_id(user_id)
-            if not user:
-                return False, "Usuario no encontrado"
-            
             success = self.user_repo.delete_user(user_id)
             if not success:
-                return False, "Error eliminando usuario"
+                return False, "Usuario no encontrado"
+            
+            invalidate_users_list_cache()
             
             AuditLogger.log_action(
                 user_id=user_id,
@@ -6,21 +6,40 @@ from .security import (
     get_password_hash,
     create_access_token,
     create_refresh_token,
+    hash_token,
     verify_token
 )
-from .storage import CloudStorageManager, FileValidator, storage_manager
-from .audit import AuditLogger, AppLogger, setup_app_logging
+from .identifiers import parse_uuid
+from .storage import CloudStorageManager, FileValidator, HashingReader, storage_manager
+from .audit import (
+    AuditLogger,
+    AuditWorker,
+    AppLogger,
+    setup_app_logging,
+    shutdown_app_logging,
+    start_audit_worker,
+    stop_audit_worker
+)
+from .middleware import AllowedHostsMiddleware
 
 __all__ = [
     "verify_password",
     "get_password_hash",
     "create_access_token", 
     "create_refresh_token",
+    "hash_token",
     "verify_token",
+    "parse_uuid",
     "CloudStorageManager",
     "FileValidator",
+    "HashingReader",
     "storage_manager",
     "AuditLogger",
+    "AuditWorker",
     "AppLogger",
-    "setup_app_logging"
+    "setup_app_logging",
+    "shutdown_app_logging",
+    "start_audit_worker",
+    "stop_audit_worker",
+    "AllowedHostsMiddleware"
 ]
\ No newline at end of file
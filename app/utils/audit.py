@@ -1,7 +1,128 @@
+import asyncio
 import logging
-import json
-from typing import Optional
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime, timezone
+from typing import List, Optional
 from app.config.settings import settings
+from app.database import SessionLocal
+from app.repositories.audit_repository import AuditRepository
+from app.utils.identifiers import parse_uuid
+
+
+_log = logging.getLogger("roda_auth.audit")
+
+# Se leen una sola vez: con la auditoría desactivada log_action sale antes
+# de armar el registro
+_AUDIT_ENABLED = settings.AUDIT_ENABLED
+_AUDIT_ACTIONS = frozenset(settings.AUDIT_ACTIONS)
+
+
+def _write_audit_batch(audit_rows: List[dict]):
+    db = SessionLocal()
+    try:
+        AuditRepository(db).bulk_create_audit_logs(audit_rows)
+    finally:
+        db.close()
+
+
+def _write_with_rollback(repository: AuditRepository, audit_rows: List[dict]):
+    try:
+        repository.bulk_create_audit_logs(audit_rows)
+    except Exception:
+        repository.db.rollback()
+        raise
+
+
+class AuditWorker:
+    """
+    Cola en memoria que saca la escritura de auditoría del request:
+    log_action encola y una tarea de fondo inserta los registros por lotes
+    """
+    
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _queue: Optional[asyncio.Queue] = None
+    _task: Optional[asyncio.Task] = None
+    
+    @classmethod
+    def start(cls):
+        cls._loop = asyncio.get_running_loop()
+        cls._queue = asyncio.Queue(maxsize=settings.AUDIT_QUEUE_MAXSIZE)
+        cls._task = asyncio.create_task(cls._run(cls._queue))
+    
+    @classmethod
+    async def stop(cls):
+        """Dejar de aceptar registros y vaciar la cola antes de salir"""
+        if cls._task is None:
+            return
+        
+        queue, task = cls._queue, cls._task
+        cls._loop = cls._queue = cls._task = None
+        
+        await queue.put(None)
+        await task
+    
+    @classmethod
+    def submit(cls, audit_data: dict) -> bool:
+        """Encolar desde el event loop o desde el threadpool; False si el worker no corre"""
+        loop, queue = cls._loop, cls._queue
+        if loop is None or loop.is_closed():
+            return False
+        
+        try:
+            loop.call_soon_threadsafe(cls._enqueue, queue, audit_data)
+        except RuntimeError:
+            # El loop se cerró entre la comprobación y la llamada
+            return False
+        return True
+    
+    @classmethod
+    def _enqueue(cls, queue: asyncio.Queue, audit_data: dict):
+        # Un submit que leyó el loop antes de stop() puede llegar después del
+        # centinela, cuando _run ya no leerá la cola: se escribe directamente
+        if queue is not cls._queue:
+            try:
+                _write_audit_batch([audit_data])
+            except Exception:
+                _log.error("Error registrando auditoría", exc_info=True)
+            return
+        
+        try:
+            queue.put_nowait(audit_data)
+        except asyncio.QueueFull:
+            _log.error("Cola de auditoría llena, registro descartado: %s", audit_data["action"])
+    
+    @classmethod
+    async def _run(cls, queue: asyncio.Queue):
+        # Una sola sesión para toda la vida del worker: los lotes se escriben
+        # de a uno, y tras cada commit la conexión vuelve al pool
+        repository = AuditRepository(SessionLocal())
+        try:
+            running = True
+            while running:
+                item = await queue.get()
+                if item is not None:
+                    await asyncio.sleep(settings.AUDIT_FLUSH_INTERVAL_SECONDS)
+                
+                batch = []
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= settings.AUDIT_BATCH_SIZE or queue.empty():
+                        break
+                    item = queue.get_nowait()
+                
+                running = item is not None
+                if batch:
+                    await cls._flush(repository, batch)
+        finally:
+            repository.db.close()
+    
+    @staticmethod
+    async def _flush(repository: AuditRepository, batch: List[dict]):
+        try:
+            await asyncio.to_thread(_write_with_rollback, repository, batch)
+        except Exception:
+            _log.error("Error registrando auditoría", exc_info=True)
 
 
 class AuditLogger:
@@ -15,42 +136,95 @@ class AuditLogger:
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None
     ):
+        if not _AUDIT_ENABLED or (_AUDIT_ACTIONS and action not in _AUDIT_ACTIONS):
+            return
+        
         try:
-            from app.repositories.audit_repository import AuditRepository
-            from app.models import AuditLog
-            
             audit_data = {
-                "user_id": user_id,
+                "user_id": parse_uuid(user_id),
                 "action": action,
                 "resource": resource,
-                "details": json.dumps(details) if details else None,
+                "details": details or None,
                 "ip_address": ip_address,
-                "user_agent": user_agent
+                "user_agent": user_agent,
+                "created_at": datetime.now(timezone.utc)
             }
             
-            audit_repo = AuditRepository()
-            audit_repo.create_audit_log(audit_data)
+            if not AuditWorker.submit(audit_data):
+                _write_audit_batch([audit_data])
             
-        except Exception as e:
-            logging.error(f"Error registrando auditoría: {e}")
+        except Exception:
+            _log.error("Error registrando auditoría", exc_info=True)
 
 
 class AppLogger:
+    """
+    Los registros se encolan en el hilo que los emite y un QueueListener los
+    escribe en archivo y consola desde su propio hilo, fuera del request
+    """
     
-    @staticmethod
-    def setup_logging():
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('app.log'),
-                logging.StreamHandler()
-            ]
-        )
-        
+    _listener: Optional[QueueListener] = None
+    _queue_handler: Optional[QueueHandler] = None
+    
+    @classmethod
+    def setup_logging(cls):
         app_logger = logging.getLogger('roda_auth')
+        if cls._listener is not None:
+            return app_logger
+        
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        handlers = [
+            logging.FileHandler('app.log'),
+            logging.StreamHandler()
+        ]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        log_queue = queue.SimpleQueue()
+        cls._queue_handler = QueueHandler(log_queue)
+        cls._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        cls._listener.start()
+        
+        root_logger = logging.getLogger()
+        root_logger.setLevel(logging.INFO)
+        root_logger.addHandler(cls._queue_handler)
+        
+        # 'roda_auth' usa el mismo QueueHandler y no propaga, para que sus
+        # registros no recorran además la cadena del logger raíz
+        app_logger.setLevel(logging.INFO)
+        app_logger.propagate = False
+        app_logger.addHandler(cls._queue_handler)
+        
         return app_logger
+    
+    @classmethod
+    def shutdown_logging(cls):
+        """Vaciar la cola de registros y cerrar los handlers"""
+        if cls._listener is None:
+            return
+        
+        listener, queue_handler = cls._listener, cls._queue_handler
+        cls._listener = cls._queue_handler = None
+        
+        logging.getLogger().removeHandler(queue_handler)
+        logging.getLogger('roda_auth').removeHandler(queue_handler)
+        
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
 
 
 def setup_app_logging():
-    return AppLogger.setup_logging()
\ No newline at end of file
+    return AppLogger.setup_logging()
+
+
+def shutdown_app_logging():
+    AppLogger.shutdown_logging()
+
+
+def start_audit_worker():
+    AuditWorker.start()
+
+
+async def stop_audit_worker():
+    await AuditWorker.stop()
\ No newline at end of file
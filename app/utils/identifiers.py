@@ -0,0 +1,19 @@
+import re
+from typing import Optional, Union
+from uuid import UUID
+
+_UUID_RE = re.compile(
+    r"^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$",
+    re.IGNORECASE
+)
+
+
+def parse_uuid(value: Union[str, UUID, None]) -> Optional[UUID]:
+    """Convertir a UUID sin lanzar excepción; None si el formato no es válido"""
+    if isinstance(value, UUID):
+        return value
+
+    if not value or not _UUID_RE.fullmatch(value):
+        return None
+
+    return UUID(value)
@@ -0,0 +1,35 @@
+from typing import Iterable
+
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class AllowedHostsMiddleware:
+    """
+    Validar el header Host contra un frozenset de hosts exactos y una tupla
+    de sufijos (por ejemplo ".roda.com"), sin recorrer patrones por request
+    """
+    
+    def __init__(self, app: ASGIApp, allowed_hosts: Iterable[str], allowed_suffixes: Iterable[str] = ()):
+        self.app = app
+        self.allowed_hosts = frozenset(allowed_hosts)
+        self.allowed_suffixes = tuple(allowed_suffixes)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        
+        host = b""
+        for key, value in scope["headers"]:
+            if key == b"host":
+                host = value
+                break
+        
+        hostname = host.decode("latin-1").split(":", 1)[0]
+        if hostname in self.allowed_hosts or hostname.endswith(self.allowed_suffixes):
+            await self.app(scope, receive, send)
+            return
+        
+        response = PlainTextResponse("Invalid host header", status_code=400)
+        await response(scope, receive, send)
@@ -1,6 +1,8 @@
+import hashlib
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+import jwt
 from passlib.context import CryptContext
 from app.config.settings import settings
 
@@ -12,10 +14,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    print(password)
     return pwd_context.hash(password)
 
 
+def hash_token(token: str) -> bytes:
+    """SHA-256 del token; es lo único que se guarda de los refresh tokens"""
+    return hashlib.sha256(token.encode()).digest()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -31,7 +37,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -45,5 +51,5 @@ def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
             return None
             
         return payload
-    except JWTError:
+    except jwt.InvalidTokenError:
         return None
\ No newline at end of file
@@ -1,11 +1,54 @@
 
+import hashlib
+import logging
 import uuid
-from typing import Tuple
+from typing import BinaryIO, Tuple
 from pathlib import Path
 from google.cloud import storage as gcs
 from app.config.settings import settings
 
 
+logger = logging.getLogger("roda_auth")
+
+# Con size=None el cliente GCS usa la subida resumable y lee el archivo en
+# fragmentos de este tamaño (múltiplo de 256 KiB); con el tamaño conocido y
+# menor a 8 MB haría una subida multipart que carga el archivo completo
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class HashingReader:
+    """
+    Envuelve el archivo que se sube y calcula el SHA-256 de los bytes que lee
+    el cliente. Si la subida resumable retrocede para reenviar un fragmento,
+    los bytes ya contados no se vuelven a sumar
+    """
+    
+    def __init__(self, file_obj: BinaryIO):
+        self._file = file_obj
+        self._digest = hashlib.sha256()
+        self._hashed_bytes = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        position = self._file.tell()
+        data = self._file.read(size)
+        
+        end = position + len(data)
+        if position <= self._hashed_bytes < end:
+            self._digest.update(data[self._hashed_bytes - position:])
+            self._hashed_bytes = end
+        
+        return data
+    
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+    
+    def tell(self) -> int:
+        return self._file.tell()
+    
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
 class CloudStorageManager:
     
     def __init__(self):
@@ -18,29 +61,31 @@ class CloudStorageManager:
             
             self.gcs_client = gcs.Client()
         except Exception as e:
-            print(f"Error inicializando cliente de almacenamiento: {e}")
+            logger.error("Error inicializando cliente de almacenamiento: %s", e)
     
-    def upload_file(self, file_content: bytes, filename: str, content_type: str) -> Tuple[bool, str]:
+    def upload_file(self, file_obj: BinaryIO, filename: str, content_type: str) -> Tuple[bool, str]:
 
         try:
             file_extension = Path(filename).suffix
             unique_filename = f"{uuid.uuid4()}{file_extension}"
-            return self._upload_to_gcs(file_content, unique_filename, content_type)
+            return self._upload_to_gcs(file_obj, unique_filename, content_type)
             
         except Exception as e:
             return False, f"Error subiendo archivo: {str(e)}"
     
     
-    def _upload_to_gcs(self, file_content: bytes, filename: str, content_type: str) -> Tuple[bool, str]:
+    def _upload_to_gcs(self, file_obj: BinaryIO, filename: str, content_type: str) -> Tuple[bool, str]:
         try:
             if not self.gcs_client:
                 return False, "Cliente GCS no configurado"
             
             bucket = self.gcs_client.bucket(settings.GCP_BUCKET_NAME)
-            blob = bucket.blob(filename)
+            blob = bucket.blob(filename, chunk_size=UPLOAD_CHUNK_SIZE)
             
-            blob.upload_from_string(
-                file_content,
+            blob.upload_from_file(
+                file_obj,
+                rewind=True,
+                size=None,
                 content_type=content_type
             )
             
@@ -61,20 +106,33 @@ class FileValidator:
         "image/webp": ".webp"
     }
     
-    MAX_FILE_SIZE = 5 * 1024 * 1024
+    MAX_FILE_SIZE = settings.MAX_UPLOAD_BYTES
+    
+    HEADER_SIZE = 12
     
     @classmethod
-    def validate_image(cls, file_content: bytes, content_type: str) -> Tuple[bool, str]:
+    def validate_image(cls, size: int, content_type: str, header: bytes) -> Tuple[bool, str]:
 
         if content_type not in cls.ALLOWED_IMAGE_TYPES:
             return False, f"Tipo de archivo no permitido. Tipos permitidos: {list(cls.ALLOWED_IMAGE_TYPES.keys())}"
         
-        if len(file_content) > cls.MAX_FILE_SIZE:
+        if size > cls.MAX_FILE_SIZE:
             return False, f"Archivo demasiado grande. Tamaño máximo: {cls.MAX_FILE_SIZE // (1024*1024)}MB"
         
-        if len(file_content) < 100:  
+        if size < 100:  
             return False, "Archivo demasiado pequeño para ser una imagen válida"
         
+        if not cls._has_image_signature(header):
+            return False, "El contenido del archivo no corresponde a una imagen JPEG, PNG o WEBP"
+        
         return True, "Archivo válido"
+    
+    @staticmethod
+    def _has_image_signature(header: bytes) -> bool:
+        return (
+            header.startswith(b"\xff\xd8\xff")
+            or header.startswith(b"\x89PNG\r\n\x1a\n")
+            or (header[:4] == b"RIFF" and header[8:12] == b"WEBP")
+        )
 
 storage_manager = CloudStorageManager()
\ No newline at end of file
@@ -10,6 +10,8 @@ from alembic import context
 from app.config import settings
 
 from app.models import Base
+# Registrar las tablas en Base.metadata para que autogenerate las compare
+from app.models import audit_model, refresh_token_model, user_model  # noqa: E402,F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -31,6 +33,14 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# Índices creados con SQL en las migraciones que no se declaran en los modelos
+# (ix_users_search_trgm es un índice GIN pg_trgm sobre una expresión)
+_UNMANAGED_INDEXES = frozenset({'ix_users_search_trgm'})
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == 'index' and name in _UNMANAGED_INDEXES)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -53,6 +63,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -76,7 +87,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
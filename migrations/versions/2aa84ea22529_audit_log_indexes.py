@@ -0,0 +1,38 @@
+"""audit log indexes
+
+Revision ID: 2aa84ea22529
+Revises: 3b4d9e4113dd
+Create Date: 2026-10-15 05:40:37.670059
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2aa84ea22529'
+down_revision: Union[str, None] = '3b4d9e4113dd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_audit_logs_user_id_created_at',
+        'audit_logs',
+        ['user_id', sa.text('created_at DESC')],
+        unique=False
+    )
+    op.create_index(
+        'ix_audit_logs_action_created_at',
+        'audit_logs',
+        ['action', sa.text('created_at DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_logs_action_created_at', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_user_id_created_at', table_name='audit_logs')
@@ -0,0 +1,54 @@
+"""users table
+
+Revision ID: 3b4d9e4113dd
+Revises: ae25b9736043
+Create Date: 2026-10-15 06:20:11.804391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b4d9e4113dd'
+down_revision: Union[str, None] = 'ae25b9736043'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Las bases creadas antes de esta revisión obtenían la tabla users con
+    # create_all al arrancar el servicio; en ese caso ya existe y se conserva
+    if sa.inspect(op.get_bind()).has_table('users'):
+        return
+    
+    op.create_table(
+        'users',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('cedula', sa.String(length=20), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('first_name', sa.String(length=100), nullable=False),
+        sa.Column('last_name', sa.String(length=100), nullable=False),
+        sa.Column('phone', sa.String(length=20), nullable=False),
+        sa.Column('address', sa.Text(), nullable=False),
+        sa.Column('profile_photo_url', sa.String(length=500), nullable=True),
+        sa.Column('document_front_url', sa.String(length=500), nullable=True),
+        sa.Column('document_back_url', sa.String(length=500), nullable=True),
+        sa.Column('role', sa.Enum('CUSTOMER', 'ADMIN', 'AGENT', name='userrole'), nullable=False),
+        sa.Column('status', sa.Enum('ACTIVE', 'INACTIVE', 'SUSPENDED', 'PENDING_VERIFICATION', name='userstatus'), nullable=False),
+        sa.Column('is_verified', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_login', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_cedula'), 'users', ['cedula'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_cedula'), table_name='users')
+    op.drop_table('users')
+    sa.Enum(name='userstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
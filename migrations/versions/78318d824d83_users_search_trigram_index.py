@@ -0,0 +1,29 @@
+"""users search trigram index
+
+Revision ID: 78318d824d83
+Revises: 2aa84ea22529
+Create Date: 2026-10-15 05:43:26.042522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '78318d824d83'
+down_revision: Union[str, None] = '2aa84ea22529'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX ix_users_search_trgm ON users "
+        "USING gin ((first_name || ' ' || last_name || ' ' || cedula) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_search_trgm', table_name='users')
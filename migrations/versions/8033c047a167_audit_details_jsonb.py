@@ -0,0 +1,41 @@
+"""audit details jsonb
+
+Revision ID: 8033c047a167
+Revises: 7e272ee42f98
+Create Date: 2026-10-15 06:02:41.512937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8033c047a167'
+down_revision: Union[str, None] = '7e272ee42f98'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'audit_logs',
+        'details',
+        existing_type=sa.Text(),
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=True,
+        postgresql_using='details::jsonb'
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'audit_logs',
+        'details',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        type_=sa.Text(),
+        existing_nullable=True,
+        postgresql_using='details::text'
+    )